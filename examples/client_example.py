@@ -13,34 +13,74 @@ Example:
 """
 
 import argparse
+import functools
 import sys
-import time
-from concurrent.futures import ThreadPoolExecutor
 
-import grpc
-
-# Import the generated protobuf modules
-# Note: These need to be generated from the .proto file
-try:
-    import photorec_pb2
-    import photorec_pb2_grpc
-except ImportError:
-    print("Error: Protobuf modules not found.")
-    print("Please generate them using:")
-    print(
-        "  python3 -m grpc_tools.protoc --python_out=. --grpc_python_out=. -I. proto/photorec.proto"
-    )
-    sys.exit(1)
+# Selects the protobuf backend, so it must precede grpc and generated modules
+import grpc_client_common
 
+import grpc
 
-def test_server_connection(server_address):
-    """Test basic server connectivity."""
+# The receive limit is raised above gRPC's 4 MB default so large
+# disk/partition listings are not rejected
+CHANNEL_OPTIONS = grpc_client_common.KEEPALIVE_OPTIONS + [
+    ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+]
+
+# Bytes per GiB, used when printing disk and partition sizes
+_GB = 1024.0**3
+
+
+def _warm_up_messages():
+    """Round-trip each message this script uses so descriptor setup does not land on the first RPC."""
+    samples = [
+        testdisk_pb2.InitializeRequest(),
+        testdisk_pb2.InitializeResponse(),
+        testdisk_pb2.GetDisksRequest(),
+        testdisk_pb2.GetDisksResponse(disks=[testdisk_pb2.DiskInfo()]),
+        testdisk_pb2.GetPartitionsRequest(),
+        testdisk_pb2.GetPartitionsResponse(partitions=[testdisk_pb2.PartitionInfo()]),
+        testdisk_pb2.CleanupRequest(),
+        testdisk_pb2.CleanupResponse(),
+    ]
+    # Generated modules from an older proto may lack the Discover messages
+    if hasattr(testdisk_pb2, "DiscoverRequest"):
+        samples.append(testdisk_pb2.DiscoverRequest())
+        samples.append(testdisk_pb2.DiscoverEvent(disk=testdisk_pb2.DiskInfo()))
+    for message in samples:
+        type(message).FromString(message.SerializeToString())
+
+
+def _format_disk(index, disk):
+    """Return the report lines describing a single disk."""
+    return [
+        f"    {index+1}. {disk.device}",
+        f"       Description: {disk.description}",
+        f"       Size: {disk.size:,} bytes ({disk.size / _GB:.2f} GB)",
+        f"       Model: {disk.model}",
+        f"       Serial: {disk.serial_no}",
+        "",
+    ]
+
+
+def _format_partition(partition):
+    """Return the report lines describing a single partition."""
+    return [
+        f"    Partition {partition.order}:",
+        f"      Name: {partition.name}",
+        f"      Filesystem: {partition.filesystem}",
+        f"      Offset: {partition.offset:,} bytes",
+        f"      Size: {partition.size:,} bytes ({partition.size / _GB:.2f} GB)",
+        f"      Status: {partition.status}",
+        "",
+    ]
+
+
+def test_server_connection(channel, server_address):
+    """Test basic server connectivity on an existing channel."""
     print(f"Testing connection to {server_address}...")
 
     try:
-        # Create insecure channel
-        channel = grpc.insecure_channel(server_address)
-
         # Test connection with a timeout
         try:
             grpc.channel_ready_future(channel).result(timeout=5)
@@ -55,134 +95,236 @@ def test_server_connection(server_address):
         return False
 
 
-def test_initialization(stub, device_path, recovery_dir):
+def _rpc(fn):
+    """Report gRPC failures of a test helper and return None instead of raising."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except grpc.RpcError as e:
+            print(f"✗ {fn.__name__}: {e.code()}: {e.details()}")
+            return None
+
+    return wrapper
+
+
+@_rpc
+def test_initialization(stub, device_path, recovery_dir, timeout):
     """Test PhotoRec initialization."""
     print(f"\nTesting PhotoRec initialization...")
     print(f"Device: {device_path}")
     print(f"Recovery directory: {recovery_dir}")
 
-    try:
-        # Create initialization request
-        request = photorec_pb2.InitializeRequest(
-            device=device_path,
-            recovery_dir=recovery_dir,
-            log_mode=1,  # Info level logging
-            log_file="",  # No log file
-        )
-
-        # Call the Initialize method
-        response = stub.Initialize(request)
+    # Create initialization request
+    request = testdisk_pb2.InitializeRequest(
+        log_mode=1,  # Info level logging
+        log_file="",  # No log file
+    )
 
-        if response.success:
-            print(f"✓ Initialization successful")
-            print(f"  Context ID: {response.context_id}")
-            return response.context_id
-        else:
-            print(f"✗ Initialization failed: {response.error_message}")
-            return None
+    # Call the Initialize method
+    response = stub.Initialize(request, timeout=timeout)
 
-    except Exception as e:
-        print(f"✗ Initialization error: {e}")
+    if response.success:
+        print(f"✓ Initialization successful")
+        print(f"  Context ID: {response.context_id}")
+        return response.context_id
+    else:
+        print(f"✗ Initialization failed: {response.error_message}")
         return None
 
 
-def test_get_disks(stub, context_id):
+@_rpc
+def test_get_disks(stub, context_id, timeout):
     """Test getting available disks."""
     print(f"\nTesting disk discovery...")
 
-    try:
-        # Create request
-        request = photorec_pb2.GetDisksRequest(context_id=context_id)
-
-        # Call the GetDisks method
-        response = stub.GetDisks(request)
-
-        if response.success:
-            print(f"✓ Disk discovery successful")
-            print(f"  Found {len(response.disks)} disk(s):")
-
-            for i, disk in enumerate(response.disks):
-                print(f"    {i+1}. {disk.device}")
-                print(f"       Description: {disk.description}")
-                print(
-                    f"       Size: {disk.size:,} bytes ({disk.size / (1024**3):.2f} GB)"
-                )
-                print(f"       Model: {disk.model}")
-                print(f"       Serial: {disk.serial_no}")
-                print()
-
-            return response.disks
-        else:
-            print(f"✗ Disk discovery failed: {response.error_message}")
-            return []
+    # Create request
+    request = testdisk_pb2.GetDisksRequest(context_id=context_id)
 
-    except Exception as e:
-        print(f"✗ Disk discovery error: {e}")
+    # Call the GetDisks method
+    response = stub.GetDisks(request, timeout=timeout)
+
+    if response.success:
+        lines = [
+            f"✓ Disk discovery successful",
+            f"  Found {len(response.disks)} disk(s):",
+        ]
+        for i, disk in enumerate(response.disks):
+            lines.extend(_format_disk(i, disk))
+        sys.stdout.write("\n".join(lines) + "\n")
+
+        return response.disks
+    else:
+        print(f"✗ Disk discovery failed: {response.error_message}")
         return []
 
 
-def test_get_partitions(stub, context_id, device_path):
+@_rpc
+def test_get_partitions(stub, context_id, device_path, timeout):
     """Test getting partitions on a disk."""
     print(f"\nTesting partition discovery for {device_path}...")
 
-    try:
-        # Create request
-        request = photorec_pb2.GetPartitionsRequest(
-            context_id=context_id, device=device_path
-        )
-
-        # Call the GetPartitions method
-        response = stub.GetPartitions(request)
-
-        if response.success:
-            print(f"✓ Partition discovery successful")
-            print(f"  Found {len(response.partitions)} partition(s):")
-
-            for partition in response.partitions:
-                print(f"    Partition {partition.order}:")
-                print(f"      Name: {partition.name}")
-                print(f"      Filesystem: {partition.filesystem}")
-                print(f"      Offset: {partition.offset:,} bytes")
-                print(
-                    f"      Size: {partition.size:,} bytes ({partition.size / (1024**3):.2f} GB)"
-                )
-                print(f"      Status: {partition.status}")
-                print()
-
-            return response.partitions
-        else:
-            print(f"✗ Partition discovery failed: {response.error_message}")
-            return []
+    # Create request
+    request = testdisk_pb2.GetPartitionsRequest(
+        context_id=context_id, device=device_path
+    )
 
-    except Exception as e:
-        print(f"✗ Partition discovery error: {e}")
+    # Call the GetPartitions method
+    response = stub.GetPartitions(request, timeout=timeout)
+
+    if response.success:
+        lines = [
+            f"✓ Partition discovery successful",
+            f"  Found {len(response.partitions)} partition(s):",
+        ]
+        for partition in response.partitions:
+            lines.extend(_format_partition(partition))
+        sys.stdout.write("\n".join(lines) + "\n")
+
+        return response.partitions
+    else:
+        print(f"✗ Partition discovery failed: {response.error_message}")
         return []
 
 
-def test_cleanup(stub, context_id):
+@_rpc
+def test_cleanup(stub, context_id, timeout):
     """Test cleanup of PhotoRec context."""
     print(f"\nTesting cleanup...")
 
+    # Create request
+    request = testdisk_pb2.CleanupRequest(context_id=context_id)
+
+    # Call the Cleanup method
+    response = stub.Cleanup(request, timeout=timeout)
+
+    if response.success:
+        print(f"✓ Cleanup successful")
+        return True
+    else:
+        print(f"✗ Cleanup failed: {response.error_message}")
+        return False
+
+
+@_rpc
+def test_discover(stub, device_path, recovery_dir, timeout):
+    """
+    Test initialization, disk and partition discovery and cleanup in a single
+    server-streaming Discover call.
+
+    Falls back to the individual unary RPCs when the generated modules or the
+    server do not provide Discover.
+    Returns a ``(disks, partitions)`` tuple, or None if initialization or the
+    Discover call failed.
+    """
+    if not hasattr(stub, "Discover") or not hasattr(testdisk_pb2, "DiscoverRequest"):
+        return test_unary_discovery(stub, device_path, recovery_dir, timeout)
+
+    print(f"\nTesting streamed discovery for {device_path}...")
+
+    request = testdisk_pb2.DiscoverRequest(
+        device=device_path,
+        log_mode=1,  # Info level logging
+        log_file="",  # No log file
+    )
+
+    init_lines = []
+    disk_lines = []
+    partition_lines = []
+    cleanup_lines = []
+    disks = []
+    partitions = []
+    disks_error = None
+    partitions_error = None
+    initialized = False
+    completed = False
     try:
-        # Create request
-        request = photorec_pb2.CleanupRequest(context_id=context_id)
+        for event in stub.Discover(request, timeout=timeout):
+            kind = event.WhichOneof("event")
+            if kind == "initialized":
+                initialized = event.initialized.success
+                if initialized:
+                    init_lines.append("✓ Initialization successful")
+                    init_lines.append(f"  Context ID: {event.initialized.context_id}")
+                else:
+                    init_lines.append(
+                        f"✗ Initialization failed: {event.initialized.error_message}"
+                    )
+            elif kind == "disk":
+                disk_lines.extend(_format_disk(len(disks), event.disk))
+                disks.append(event.disk)
+            elif kind == "disks_error":
+                disks_error = event.disks_error
+            elif kind == "partition":
+                partition_lines.extend(_format_partition(event.partition))
+                partitions.append(event.partition)
+            elif kind == "partitions_error":
+                partitions_error = event.partitions_error
+            elif kind == "cleaned_up":
+                completed = True
+                if event.cleaned_up.success:
+                    cleanup_lines.append("✓ Cleanup successful")
+                else:
+                    cleanup_lines.append(
+                        f"✗ Cleanup failed: {event.cleaned_up.error_message}"
+                    )
+    except grpc.RpcError as e:
+        if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+            raise
+        print("  Discover is not supported by the server, using unary RPCs")
+        return test_unary_discovery(stub, device_path, recovery_dir, timeout)
+    finally:
+        # Same section headers as the unary path; success headers are only
+        # claimed once the stream has run to completion
+        lines = init_lines
+        if disks_error is not None:
+            lines.append(f"✗ Disk discovery failed: {disks_error}")
+        elif completed:
+            lines.append("✓ Disk discovery successful")
+            lines.append(f"  Found {len(disks)} disk(s):")
+        lines.extend(disk_lines)
+        if partitions_error is not None:
+            lines.append(f"✗ Partition discovery failed: {partitions_error}")
+        elif completed:
+            lines.append("✓ Partition discovery successful")
+            lines.append(f"  Found {len(partitions)} partition(s):")
+        lines.extend(partition_lines)
+        lines.extend(cleanup_lines)
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+
+    if not initialized:
+        return None
+    return disks, partitions
 
-        # Call the Cleanup method
-        response = stub.Cleanup(request)
 
-        if response.success:
-            print(f"✓ Cleanup successful")
-            return True
-        else:
-            print(f"✗ Cleanup failed: {response.error_message}")
-            return False
+@_rpc
+def test_unary_discovery(stub, device_path, recovery_dir, timeout):
+    """
+    Test initialization, disk and partition discovery and cleanup through the
+    individual unary RPCs.
 
-    except Exception as e:
-        print(f"✗ Cleanup error: {e}")
-        return False
+    Returns a ``(disks, partitions)`` tuple, or None if initialization or a
+    call made outside the per-step helpers failed.
+    """
+    context_id = test_initialization(stub, device_path, recovery_dir, timeout)
+    if not context_id:
+        return None
 
+    try:
+        # Both calls use the same server-side context, and GetPartitions
+        # switches its current disk, so they must not overlap
+        disks = test_get_disks(stub, context_id, timeout)
+        partitions = test_get_partitions(stub, context_id, device_path, timeout)
+        return disks, partitions
+    finally:
+        test_cleanup(stub, context_id, timeout)
 
-def main():
+
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """Build the command-line parser once and reuse it across main() calls."""
     parser = argparse.ArgumentParser(description="Test PhotoRec gRPC Server")
     parser.add_argument(
         "server_address",
@@ -201,9 +343,36 @@ def main():
         default="/tmp/photorec_test",
         help="Recovery directory (default: /tmp/photorec_test)",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Deadline in seconds for each RPC (default: 30.0)",
+    )
+
+    return parser
+
 
+def main():
+    parser = _build_parser()
     args = parser.parse_args()
 
+    # Import the generated protobuf modules lazily so that importing this
+    # script or running --help does not pay descriptor-registration cost.
+    # Note: These need to be generated from the .proto file
+    global testdisk_pb2, testdisk_pb2_grpc
+    try:
+        import testdisk_pb2
+        import testdisk_pb2_grpc
+    except ImportError:
+        print("Error: Protobuf modules not found.")
+        print("Please generate them using:")
+        print(
+            "  python3 -m grpc_tools.protoc --python_out=. --grpc_python_out=. -Iproto proto/testdisk.proto"
+        )
+        sys.exit(1)
+    _warm_up_messages()
+
     print("PhotoRec gRPC Server Test")
     print("=" * 40)
     print(f"Server: {args.server_address}")
@@ -211,31 +380,28 @@ def main():
     print(f"Recovery dir: {args.recovery_dir}")
     print()
 
+    # Create a single channel shared by the connectivity probe and all RPCs
+    channel = grpc.insecure_channel(args.server_address, options=CHANNEL_OPTIONS)
+
     # Test server connection
-    if not test_server_connection(args.server_address):
+    if not test_server_connection(channel, args.server_address):
         print("\n❌ Server connection failed. Please ensure the server is running.")
+        channel.close()
         sys.exit(1)
 
-    # Create channel and stub
-    channel = grpc.insecure_channel(args.server_address)
-    stub = photorec_pb2_grpc.PhotoRecServiceStub(channel)
-
-    context_id = None
+    stub = testdisk_pb2_grpc.TestDiskServiceStub(channel)
 
     try:
-        # Test initialization
-        context_id = test_initialization(stub, args.device_path, args.recovery_dir)
-        if not context_id:
-            print("\n❌ Initialization failed. Cannot continue testing.")
+        discovered = test_discover(
+            stub, args.device_path, args.recovery_dir, args.timeout
+        )
+        if discovered is None:
+            print("\n❌ Discovery failed. Cannot continue testing.")
             sys.exit(1)
 
-        # Test disk discovery
-        disks = test_get_disks(stub, context_id)
+        disks, partitions = discovered
         if not disks:
             print("\n⚠️  No disks found. This might be normal depending on your system.")
-
-        # Test partition discovery
-        partitions = test_get_partitions(stub, context_id, args.device_path)
         if not partitions:
             print(
                 "\n⚠️  No partitions found. This might be normal depending on your device."
@@ -248,10 +414,6 @@ def main():
     except Exception as e:
         print(f"\n❌ Test failed with error: {e}")
     finally:
-        # Clean up
-        if context_id:
-            test_cleanup(stub, context_id)
-
         channel.close()
 
 
@@ -0,0 +1,32 @@
+"""
+Shared setup for the Python example clients.
+
+Import this module before grpc or any generated protobuf module.
+"""
+import importlib.util
+import os
+
+
+def _has_cpp_protobuf():
+    """Return True if the installed protobuf ships its C++ extension."""
+    try:
+        return importlib.util.find_spec("google.protobuf.pyext._message") is not None
+    except ImportError:
+        return False
+
+
+# Prefer the C++-backed protobuf runtime for message parse/serialize. Selecting
+# it without the extension installed (e.g. the pure-Python protobuf 3.x wheel)
+# makes every generated module fail to import, so only do so when it exists.
+if _has_cpp_protobuf():
+    os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "cpp")
+    os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION_VERSION", "2")
+
+# HTTP/2 keepalive pings surface dead connections within seconds instead of
+# waiting for TCP timeouts
+KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_time_ms", 10000),
+    ("grpc.keepalive_timeout_ms", 5000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
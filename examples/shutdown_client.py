@@ -3,17 +3,40 @@
 Example client to demonstrate server shutdown functionality.
 """
 import argparse
+import functools
+import os
 import sys
-from pathlib import Path
+
+# Selects the protobuf backend, so it must precede grpc and generated modules
+import grpc_client_common
 
 import grpc
 
-# Add the proto directory to the path
-sys.path.insert(0, str(Path(__file__).parent.parent / "proto"))
+# Make the generated modules in the proto directory importable; appended so
+# that standard library lookups are not slowed down by the extra entry
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "proto"))
 
-# Import the generated gRPC stubs
+# Import the generated protobuf messages (the service stub is not needed)
 import photorec_pb2
-import photorec_pb2_grpc
+
+# gRPC method path taken from the generated descriptor, as the stub would
+_SHUTDOWN_DESCRIPTOR = photorec_pb2.DESCRIPTOR.services_by_name[
+    "PhotoRecService"
+].methods_by_name["Shutdown"]
+SHUTDOWN_METHOD = (
+    f"/{_SHUTDOWN_DESCRIPTOR.containing_service.full_name}"
+    f"/{_SHUTDOWN_DESCRIPTOR.name}"
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _serialize_shutdown_request(force, reason):
+    """Serialize a ShutdownRequest once per distinct (force, reason) pair."""
+    return photorec_pb2.ShutdownRequest(force=force, reason=reason).SerializeToString()
+
+
+# Populate the cache for the default (non-forced, no reason) request at import
+_serialize_shutdown_request(False, "")
 
 
 def shutdown_server(host="localhost", port=50051, force=False, reason=""):
@@ -27,14 +50,20 @@ def shutdown_server(host="localhost", port=50051, force=False, reason=""):
         reason: Optional reason for shutdown
     """
     # Create gRPC channel
-    channel = grpc.insecure_channel(f"{host}:{port}")
+    channel = grpc.insecure_channel(
+        f"{host}:{port}", options=grpc_client_common.KEEPALIVE_OPTIONS
+    )
 
-    # Create client stub
-    stub = photorec_pb2_grpc.PhotoRecServiceStub(channel)
+    # Requests are sent pre-serialized, so bypass the stub's serializer
+    shutdown = channel.unary_unary(
+        SHUTDOWN_METHOD,
+        request_serializer=None,
+        response_deserializer=photorec_pb2.ShutdownResponse.FromString,
+    )
 
     try:
-        # Create shutdown request
-        request = photorec_pb2.ShutdownRequest(force=force, reason=reason)
+        # Reuse the cached wire bytes for this shutdown request
+        request = _serialize_shutdown_request(force, reason)
 
         print(f"Sending shutdown request to {host}:{port}...")
         print(f"Force: {force}")
@@ -42,7 +71,7 @@ def shutdown_server(host="localhost", port=50051, force=False, reason=""):
             print(f"Reason: {reason}")
 
         # Send shutdown request
-        response = stub.Shutdown(request)
+        response = shutdown(request, timeout=10.0)
 
         if response.success:
             print("✓ Shutdown request successful")
@@ -64,8 +93,9 @@ def shutdown_server(host="localhost", port=50051, force=False, reason=""):
     return True
 
 
-def main():
-    """Main function."""
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """Build the command-line parser once and reuse it across main() calls."""
     parser = argparse.ArgumentParser(
         description="Shutdown PhotoRec gRPC server remotely",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -86,6 +116,12 @@ def main():
         "--reason", "-r", default="", help="Optional reason for shutdown"
     )
 
+    return parser
+
+
+def main():
+    """Main function."""
+    parser = _build_parser()
     args = parser.parse_args()
 
     # Shutdown the server
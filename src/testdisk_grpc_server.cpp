@@ -221,7 +221,8 @@ namespace testdisk
                                               const GetDisksRequest* request,
                                               GetDisksResponse* response)
     {
-        (void)context; // Suppress unused parameter warning
+        // Disk/partition listings carry long strings; gzip them when the client accepts it
+        context->set_compression_algorithm(GRPC_COMPRESS_GZIP);
         LOG_INFO("GetDisks request received for context: " + request->context_id());
 
         try
@@ -269,7 +270,8 @@ namespace testdisk
                                                    const GetPartitionsRequest* request,
                                                    GetPartitionsResponse* response)
     {
-        (void)context; // Suppress unused parameter warning
+        // Disk/partition listings carry long strings; gzip them when the client accepts it
+        context->set_compression_algorithm(GRPC_COMPRESS_GZIP);
         LOG_INFO("GetPartitions request received for device: " + request->device() +
             " (context: " + request->context_id() + ")");
 
@@ -324,6 +326,109 @@ namespace testdisk
         }
     }
 
+    grpc::Status TestDiskGrpcServer::Discover(grpc::ServerContext* context,
+                                              const DiscoverRequest* request,
+                                              grpc::ServerWriter<DiscoverEvent>* writer)
+    {
+        LOG_INFO("Discover request received for device: " + request->device());
+
+        // Must be requested before the first Write sends the initial metadata
+        context->set_compression_algorithm(GRPC_COMPRESS_GZIP);
+
+        // The unary handlers below get their own context so their metadata
+        // side effects never reach this stream
+        grpc::ServerContext step_context;
+        DiscoverEvent event;
+
+        // Initialize a context that only lives for the duration of this call
+        InitializeRequest init_request;
+        *init_request.mutable_args() = request->args();
+        init_request.set_log_mode(request->log_mode());
+        init_request.set_log_file(request->log_file());
+        Initialize(&step_context, &init_request, event.mutable_initialized());
+
+        // Once a write fails or the call is cancelled (deadline, disconnect),
+        // skip the remaining steps and go straight to cleanup
+        bool client_alive = true;
+        const auto write_event = [&]()
+        {
+            client_alive = client_alive && !context->IsCancelled() && writer->Write(event);
+            return client_alive;
+        };
+
+        const bool initialized = event.initialized().success();
+        const std::string context_id = event.initialized().context_id();
+        write_event();
+        if (!initialized)
+        {
+            return grpc::Status::OK;
+        }
+
+        // Stream each disk as its own event
+        if (client_alive)
+        {
+            GetDisksRequest disks_request;
+            disks_request.set_context_id(context_id);
+            GetDisksResponse disks_response;
+            GetDisks(&step_context, &disks_request, &disks_response);
+            if (disks_response.success())
+            {
+                for (auto& disk : *disks_response.mutable_disks())
+                {
+                    event.mutable_disk()->Swap(&disk);
+                    if (!write_event())
+                    {
+                        break;
+                    }
+                }
+            }
+            else
+            {
+                event.set_disks_error(disks_response.error_message());
+                write_event();
+            }
+        }
+
+        // Stream the partitions of the requested device, if any
+        if (client_alive && !context->IsCancelled() && !request->device().empty())
+        {
+            GetPartitionsRequest partitions_request;
+            partitions_request.set_context_id(context_id);
+            partitions_request.set_device(request->device());
+            GetPartitionsResponse partitions_response;
+            GetPartitions(&step_context, &partitions_request, &partitions_response);
+            if (partitions_response.success())
+            {
+                for (auto& partition : *partitions_response.mutable_partitions())
+                {
+                    event.mutable_partition()->Swap(&partition);
+                    if (!write_event())
+                    {
+                        break;
+                    }
+                }
+            }
+            else
+            {
+                event.set_partitions_error(partitions_response.error_message());
+                write_event();
+            }
+        }
+
+        // Always release the context, even if the client has gone away
+        CleanupRequest cleanup_request;
+        cleanup_request.set_context_id(context_id);
+        Cleanup(&step_context, &cleanup_request, event.mutable_cleaned_up());
+        if (!write_event())
+        {
+            LOG_WARNING("Discover client went away, context cleaned up: " + context_id);
+            return grpc::Status::CANCELLED;
+        }
+
+        LOG_INFO("Discover completed for context: " + context_id);
+        return grpc::Status::OK;
+    }
+
     grpc::Status TestDiskGrpcServer::GetArchs(grpc::ServerContext* context,
                                               const GetArchsRequest* request,
                                               GetArchsResponse* response)
@@ -1336,6 +1441,11 @@ namespace testdisk
         builder.AddListeningPort(address, grpc::InsecureServerCredentials());
         builder.RegisterService(this);
 
+        // Accept the example clients' 10s keepalive pings, including while idle,
+        // instead of answering them with GOAWAY too_many_pings
+        builder.AddChannelArgument(GRPC_ARG_KEEPALIVE_PERMIT_WITHOUT_CALLS, 1);
+        builder.AddChannelArgument(GRPC_ARG_HTTP2_MIN_RECV_PING_INTERVAL_WITHOUT_DATA_MS, 10000);
+
         server_ = builder.BuildAndStart();
         if (!server_)
         {
@@ -72,6 +72,10 @@ namespace testdisk
                                    const GetPartitionsRequest* request,
                                    GetPartitionsResponse* response) override;
 
+        grpc::Status Discover(grpc::ServerContext* context,
+                              const DiscoverRequest* request,
+                              grpc::ServerWriter<DiscoverEvent>* writer) override;
+
         grpc::Status GetArchs(grpc::ServerContext* context,
                               const GetArchsRequest* request,
                               GetArchsResponse* response) override;